@@ -1,9 +1,12 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Projected stat columns shared by every source, and the per-player metadata
+STAT_COLS = ['Pass_Yds', 'Pass_TD', 'Int', 'Rush_Yds', 'Rush_TD', 'Rec', 'Rec_Yds', 'Rec_TD']
+META_COLS = ['Player', 'Team', 'Pos']
 
 def aggregate_data(year):
     """
@@ -13,8 +16,18 @@ def aggregate_data(year):
     projections = load_projections(year)
     adp = load_adp(year)
 
-    # Merge dataframes
-    df = pd.merge(projections, adp, on='Player', how='left')
+    # Merge dataframes; names are truncated to two parts, so guard against
+    # duplicate ADP keys fanning out into a many-to-many merge
+    try:
+        df = pd.merge(projections, adp, on='Player', how='left', validate='1:1')
+    except pd.errors.MergeError as e:
+        print(f"Warning: {e}. Keeping the first ADP entry for each player.")
+        adp = adp.drop_duplicates(subset=['Player'])
+        df = pd.merge(projections, adp, on='Player', how='left', validate='1:1')
+
+    # Position and team are low-cardinality group/filter keys
+    df['Pos'] = df['Pos'].astype('category')
+    df['Team'] = df['Team'].astype('category')
 
     # --- 2. Feature Engineering: VORP, Tiers, Volatility ---
 
@@ -23,12 +36,15 @@ def aggregate_data(year):
 
     # Calculate Volatility based on rank disagreement
     rank_cols = [col for col in df.columns if 'Rank' in col]
-    df['Volatility'] = df[rank_cols].std(axis=1)
-    # Normalize volatility to a 1-10 scale for easier interpretation
-    df['Volatility'] = 1 + 9 * (df['Volatility'] - df['Volatility'].min()) / (df['Volatility'].max() - df['Volatility'].min())
-    df['Volatility'] = df['Volatility'].fillna(5) # Fill NaN with average volatility
-
-    # Calculate Tiers using K-Means Clustering
+    volatility = df[rank_cols].std(axis=1).to_numpy()
+    # Normalize volatility to a 1-10 scale for easier interpretation,
+    # filling NaN with average volatility in the same pass
+    lo, hi = np.nanmin(volatility), np.nanmax(volatility)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = 1 + 9 * (volatility - lo) / (hi - lo)
+    df['Volatility'] = np.where(np.isnan(scaled), 5, scaled)
+
+    # Calculate Tiers from VORP rank quantiles
     df = calculate_tiers(df)
 
     # --- 3. Final Cleaning and Export ---
@@ -43,118 +59,103 @@ def aggregate_data(year):
     df_final = df_final.sort_values(by='VORP', ascending=False).reset_index(drop=True)
     df_final['Rank'] = df_final.index + 1 # Add a new overall rank based on VORP
 
-    # Convert to JSON
+    # Convert to JSON (compact; the app fetches and parses the whole array)
     output_path = f'processed/Projections-{year}.json'
-    df_final.to_json(output_path, orient='records', indent=2)
+    df_final.to_json(output_path, orient='records')
     print(f"Successfully created aggregated projections at: {output_path}")
 
 def load_projections(year):
     """Loads and merges projection data from multiple sources."""
-    projection_files = [f for f in os.listdir(f'raw/projections') if f.endswith(f'-{year}.csv')]
-    df_list = []
-    for file in projection_files:
-        source = file.split('-')[0]
-        df_source = pd.read_csv(f'raw/projections/{file}')
-        # Basic cleaning and standardizing
-        df_source['Player'] = df_source['Player'].apply(standardize_player_name)
-        # Rename columns to be source-specific
-        df_source = df_source.rename(columns={
-            'Rank': f'{source}_Rank',
-            'Overall': f'{source}_Rank'
-        })
-        df_list.append(df_source)
-
-    # Merge all projections, averaging the stats
-    df_merged = df_list[0]
-    for df_next in df_list[1:]:
-        df_merged = pd.merge(df_merged, df_next, on='Player', how='outer', suffixes=(f'_{len(df_list)}', ''))
-
-    # Group by player and average all numeric stats
-    numeric_cols = df_merged.select_dtypes(include=np.number).columns
-    df_agg = df_merged.groupby('Player').mean()[numeric_cols].reset_index()
+    projection_files = sorted(Path('raw/projections').glob(f'*-{year}.csv'))
+
+    # pd.read_csv's C parser releases the GIL, so threads overlap the reads
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(projection_files)))) as executor:
+        df_list = list(executor.map(load_projection_file, projection_files))
+
+    # Stack all projections into one long frame; source-specific rank columns
+    # are NaN for other sources' rows and are skipped by the mean
+    df_long = pd.concat(df_list, ignore_index=True, sort=False)
+
+    # Group by player and average all stats and source ranks
+    rank_cols = [col for col in df_long.columns if col.endswith('_Rank')]
+    df_agg = df_long.reindex(columns=['Player'] + STAT_COLS + rank_cols).groupby('Player', as_index=False).mean()
 
     # Consolidate non-numeric data
-    meta_cols = df_merged.select_dtypes(exclude=np.number).drop_duplicates(subset=['Player'])
-    df_final = pd.merge(df_agg, meta_cols, on='Player', how='left')
-
-    # Calculate consensus projected points
-    df_final['Projected_Points'] = (
-        df_final.get('Pass_Yds', 0) / 25 +
-        df_final.get('Pass_TD', 0) * 4 -
-        df_final.get('Int', 0) * 2 +
-        df_final.get('Rush_Yds', 0) / 10 +
-        df_final.get('Rush_TD', 0) * 6 +
-        df_final.get('Rec', 0) * 0.5 + # 0.5 PPR
-        df_final.get('Rec_Yds', 0) / 10 +
-        df_final.get('Rec_TD', 0) * 6
+    meta_cols = df_long.reindex(columns=META_COLS).drop_duplicates(subset=['Player'])
+    df_final = pd.merge(df_agg, meta_cols, on='Player', how='left', validate='1:1')
+
+    # Calculate consensus projected points (0.5 PPR) in a single fused numexpr pass;
+    # missing stats count as zero
+    stats = df_final[STAT_COLS].fillna(0)
+    df_final['Projected_Points'] = stats.eval(
+        'Pass_Yds / 25 + Pass_TD * 4 - Int * 2 + Rush_Yds / 10 + Rush_TD * 6 '
+        '+ Rec * 0.5 + Rec_Yds / 10 + Rec_TD * 6',
+        engine='numexpr',
     ).round(2)
 
     return df_final
 
+def load_projection_file(file):
+    """Loads a single source's projections, with source-specific rank columns."""
+    source = file.name.split('-')[0]
+    df_source = pd.read_csv(file, engine='c')
+    # Basic cleaning and standardizing
+    df_source['Player'] = standardize_player_name(df_source['Player'])
+    # Rename columns to be source-specific
+    return df_source.rename(columns={
+        'Rank': f'{source}_Rank',
+        'Overall': f'{source}_Rank'
+    })
+
 def load_adp(year):
     """Loads and cleans ADP data."""
     adp_path = f'raw/adp/FantasyPros-{year}.csv'
     df_adp = pd.read_csv(adp_path)
-    df_adp['Player'] = df_adp['Player'].apply(standardize_player_name)
+    df_adp['Player'] = standardize_player_name(df_adp['Player'])
     return df_adp[['Player', 'ADP']]
 
-def standardize_player_name(name):
-    """Removes suffixes like 'Jr.', 'Sr.', 'II', etc."""
-    return ' '.join(name.replace('.', '').split()[:2]) # Keep first two parts of name
+def standardize_player_name(names):
+    """Removes suffixes like 'Jr.', 'Sr.', 'II', etc. from a Series of names."""
+    return names.str.replace('.', '', regex=False).str.split().str[:2].str.join(' ') # Keep first two parts of name
 
 def calculate_vorp(df):
     """Calculates Value Over Replacement Player."""
-    df_sorted = df.sort_values(by='Projected_Points', ascending=False)
-    positions = df_sorted['Pos'].unique()
-    vorp_baselines = {}
-
     # Define replacement levels (e.g., QB20, RB40, etc.)
     replacement_levels = {'QB': 20, 'RB': 40, 'WR': 40, 'TE': 15}
 
-    for pos in positions:
-        if pos in replacement_levels:
-            pos_df = df_sorted[df_sorted['Pos'] == pos]
-            replacement_player_index = replacement_levels[pos]
-            if len(pos_df) > replacement_player_index:
-                baseline_score = pos_df.iloc[replacement_player_index]['Projected_Points']
-                vorp_baselines[pos] = baseline_score
-            else:
-                vorp_baselines[pos] = 0 # Fallback if not enough players
-
-    df['VORP'] = df.apply(
-        lambda row: round(row['Projected_Points'] - vorp_baselines.get(row['Pos'], 0), 2),
-        axis=1
-    )
+    # Take the (level + 1)th best score at each position in a single groupby pass,
+    # skipping positions (K, DST, ...) that have no replacement level
+    vorp_baselines = {}
+    scored = df.loc[df['Pos'].isin(replacement_levels.keys()), ['Pos', 'Projected_Points']]
+    for pos, points in scored.groupby('Pos', observed=True)['Projected_Points']:
+        replacement_player_index = replacement_levels[pos]
+        if len(points) > replacement_player_index:
+            vorp_baselines[pos] = points.nlargest(replacement_player_index + 1).iloc[-1]
+        else:
+            vorp_baselines[pos] = 0 # Fallback if not enough players
+
+    baselines = df['Pos'].map(vorp_baselines).astype('float64').fillna(0).to_numpy()
+    df['VORP'] = np.round(df['Projected_Points'].to_numpy(dtype='float64') - baselines, 2)
     return df
 
 def calculate_tiers(df):
-    """Calculates positional tiers using K-Means clustering."""
+    """Calculates positional tiers by bucketing players on VORP rank."""
     df['Tier'] = 0
-    positions = df['Pos'].unique()
 
     # Define number of tiers per position
     tier_counts = {'QB': 8, 'RB': 10, 'WR': 10, 'TE': 7}
 
-    for pos in positions:
-        if pos in tier_counts:
-            pos_df = df[df['Pos'] == pos].copy()
-            if len(pos_df) < tier_counts[pos]: continue
-
-            # Features for clustering: VORP and ADP
-            features = pos_df[['VORP', 'ADP']].fillna(pos_df[['VORP', 'ADP']].mean())
-            scaler = StandardScaler()
-            features_scaled = scaler.fit_transform(features)
-
-            kmeans = KMeans(n_clusters=tier_counts[pos], random_state=42, n_init=10)
-            pos_df['cluster'] = kmeans.fit_predict(features_scaled)
+    # One bucketing pass over Pos instead of a boolean mask scan per position
+    for pos, vorp in df.groupby('Pos', sort=False, observed=True)['VORP']:
+        if pos not in tier_counts: continue
+        if len(vorp) < tier_counts[pos]: continue
 
-            # Order clusters by VORP to create tiers
-            cluster_order = pos_df.groupby('cluster')['VORP'].mean().sort_values(ascending=False).index
-            tier_map = {cluster_id: i + 1 for i, cluster_id in enumerate(cluster_order)}
-            pos_df['Tier'] = pos_df['cluster'].map(tier_map)
+        # Bucket players into equal-sized tiers by VORP rank (Tier 1 = highest VORP)
+        vorp_rank = vorp.fillna(vorp.mean()).rank(method='first')
+        tiers = tier_counts[pos] - pd.qcut(vorp_rank, q=tier_counts[pos], labels=False)
 
-            # Update the main dataframe
-            df.update(pos_df['Tier'])
+        # Update the main dataframe
+        df.loc[vorp.index, 'Tier'] = tiers.to_numpy()
 
     return df
 
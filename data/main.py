@@ -25,20 +25,13 @@ def main(year: int):
     Orchestrates the entire scraping process.
     """
     LOGGER.info(f"--- Starting Fantasy Football Data Scrape for {year} ---")
-    driver = None  # Initialize driver to None
     try:
-        # This function call is the fix for the "cannot find Chrome binary" error
-        driver = scrape.setup_driver()
-
-        # Run the implemented scraper
-        scrape.scrape_fantasy_pros_adp(driver, year)
+        # FantasyPros ADP tables are server-rendered, so no WebDriver is needed
+        scrape.scrape_fantasy_pros_adp(year)
 
     except Exception as e:
         LOGGER.critical(f"A critical error occurred: {e}", exc_info=True)
     finally:
-        if driver:
-            driver.quit()
-            LOGGER.info("WebDriver has been shut down.")
         LOGGER.info(f"--- Scraping process for {year} has finished. ---")
 
 
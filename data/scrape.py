@@ -2,12 +2,15 @@
 
 """Projections and ADP scrapers, refactored for robustness and best practices."""
 
+import hashlib
+import io
 import logging
 import os
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+import requests
 from bs4 import BeautifulSoup, NavigableString
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -15,6 +18,8 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
 # --- Configuration and Constants ---
@@ -23,6 +28,14 @@ LOGGER = logging.getLogger(__name__)
 DIR = os.path.dirname(__file__)
 RAW_PROJECTIONS = os.path.join(DIR, "raw", "projections")
 RAW_ADP = os.path.join(DIR, "raw", "adp")
+PAGE_CACHE = os.path.join(DIR, "cache", "pages")
+DRIVER_PATH_CACHE = os.path.expanduser(os.path.join("~", ".cache", "ff25", "chromedriver_path"))
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+}
 
 TEAM_TO_ABRV_MAP = {
     "Cardinals": "ARI", "Falcons": "ATL", "Ravens": "BAL", "Bills": "BUF",
@@ -38,8 +51,27 @@ TEAM_TO_ABRV_MAP = {
 }
 ABRV_TO_TEAM_MAP = {v: k for k, v in TEAM_TO_ABRV_MAP.items()}
 
+# Compiled once at import for player key construction
+_NAME_STRIP_REGEX = re.compile(r"\bsr\b|st\.")
+_NAME_REGEX = re.compile(r"[^a-z ]+")
+_SPACES_REGEX = re.compile(r" +")
+
 # --- WebDriver Management ---
 
+def _chromedriver_path() -> str:
+    """Returns the ChromeDriver path, only asking webdriver-manager when the cached one is gone."""
+    if os.path.exists(DRIVER_PATH_CACHE):
+        with open(DRIVER_PATH_CACHE) as f:
+            path = f.read().strip()
+        if os.path.exists(path):
+            return path
+
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_PATH_CACHE), exist_ok=True)
+    with open(DRIVER_PATH_CACHE, "w") as f:
+        f.write(path)
+    return path
+
 def setup_driver() -> webdriver.Chrome:
     """Initializes a Selenium WebDriver with robust options for headless environments."""
     LOGGER.info("Setting up new Chrome WebDriver instance.")
@@ -55,73 +87,122 @@ def setup_driver() -> webdriver.Chrome:
     # ** THE FIX **: Explicitly tells Selenium where your Chrome binary is.
     options.binary_location = "/usr/bin/google-chrome"
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(_chromedriver_path())
     driver = webdriver.Chrome(service=service, options=options)
     LOGGER.info("WebDriver setup complete.")
     return driver
 
 # --- Helper Functions ---
 
-def _scroll(driver):
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+def _get_page_source(url, session=None, driver=None, wait_for="body"):
+    """
+    Loads a page's HTML with a plain HTTP request, or through Selenium when a driver is
+    given (for pages that need JavaScript), waiting until the `wait_for` CSS selector is
+    present. Reuses an on-disk copy when FF_PAGE_CACHE is set.
+    """
+    cache_path = None
+    if os.environ.get("FF_PAGE_CACHE"):
+        cache_path = os.path.join(PAGE_CACHE, hashlib.sha1(url.encode()).hexdigest() + ".html")
+        if os.path.exists(cache_path):
+            LOGGER.info(f"Using cached page for {url}")
+            with open(cache_path, encoding="utf-8") as f:
+                return f.read()
+
+    if driver is not None:
+        driver.get(url)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, wait_for)))
+        page_source = driver.page_source
+    else:
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        page_source = response.text
+
+    if cache_path:
+        os.makedirs(PAGE_CACHE, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            f.write(page_source)
+    return page_source
 
 def _add_player_key(df):
-    name_regex = re.compile(r"[^a-z ]+")
-    def create_key(row):
-        name_text = str(row.get("name", "")).lower().replace("sr", "").replace("st.", "").strip()
-        name_text = name_regex.sub("", name_text).strip().replace("  ", " ").split(" ")
-        last_name = name_text[1] if len(name_text) > 1 else name_text[0]
-        pos = row.get('pos', 'NA')
-        team = row.get('team', 'NA')
-        return f'{last_name}_{pos}_{team}'
-
-    df["key"] = df.apply(create_key, axis=1)
+    name_text = (
+        df["name"].fillna("").astype(str).str.lower()
+        .str.replace(_NAME_STRIP_REGEX, "", regex=True)
+        .str.replace(_NAME_REGEX, "", regex=True)
+        .str.strip()
+        .str.replace(_SPACES_REGEX, " ", regex=True)
+        .str.split(" ")
+    )
+    last_name = name_text.str.get(1).fillna(name_text.str.get(0))
+    pos = df["pos"].fillna("NA").astype(str)
+    team = df["team"].fillna("NA").astype(str)
+
+    df["key"] = last_name + "_" + pos + "_" + team
     return df.drop_duplicates(subset=["key"])
 
 # --- Scraper Functions ---
 
-def scrape_fantasy_pros_adp(driver: webdriver.Chrome, year: int):
-    """Scrape Fantasy Pros ADP."""
+def _scrape_adp_table(ppr_type, url, session=None, driver=None):
+    """Fetches and cleans a single FantasyPros ADP table, returning None on failure."""
+    LOGGER.info(f"Fetching {ppr_type} ADP from {url}")
+    try:
+        page_source = _get_page_source(url, session=session, driver=driver, wait_for="table#data tbody tr")
+
+        # Use pandas (with the C-based lxml parser) to directly parse the ADP table
+        dfs = pd.read_html(io.StringIO(page_source), flavor="lxml", attrs={"id": "data"})
+        if not dfs:
+            LOGGER.error(f"No tables found at {url}")
+            return None
+
+        df = dfs[0]
+        df = df.rename(columns={"Player Team (Bye)": "Player", "AVG": ppr_type, "Pos": "pos"})
+
+        # Data Cleaning
+        df["pos"] = df["pos"].str.extract(r'([A-Z]+)')[0]
+        split = df['Player'].str.replace(r'\s+', ' ', regex=True).str.strip().str.rsplit(' ', n=1, expand=True).reindex(columns=[0, 1])
+        df['name'], df['team'] = split[0], split[1]
+
+        current_df = df[["name", "team", "pos", ppr_type]].copy()
+        return _add_player_key(current_df)
+
+    except Exception as e:
+        LOGGER.error(f"Could not parse data for {ppr_type} at {url}: {e}")
+        return None
+
+def scrape_fantasy_pros_adp(year: int, driver: webdriver.Chrome = None):
+    """
+    Scrape Fantasy Pros ADP. The tables are server-rendered, so pages are fetched with
+    requests unless a WebDriver is passed in.
+    """
     LOGGER.info(f"Scraping FantasyPros ADP for {year}")
     urls = {
         "std": f"https://www.fantasypros.com/nfl/adp/overall.php?year={year}",
         "half_ppr": f"https://www.fantasypros.com/nfl/adp/half-point-ppr-overall.php?year={year}",
         "ppr": f"https://www.fantasypros.com/nfl/adp/ppr-overall.php?year={year}",
     }
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+
+    # The pages are independent, so fetch them concurrently. A WebDriver can only
+    # load one page at a time, so fall back to a single worker when one is used.
+    max_workers = 1 if driver is not None else len(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda item: _scrape_adp_table(*item, session=session, driver=driver),
+            urls.items(),
+        ))
+
     merged_df = None
-    for ppr_type, url in urls.items():
-        LOGGER.info(f"Fetching {ppr_type} ADP from {url}")
-        driver.get(url)
-        time.sleep(3) # Increased wait time for reliability
-        
-        try:
-            # Use pandas to directly parse the HTML table
-            dfs = pd.read_html(driver.page_source)
-            if not dfs:
-                LOGGER.error(f"No tables found at {url}")
-                continue
-            
-            df = dfs[0]
-            df = df.rename(columns={"Player Team (Bye)": "Player", "AVG": ppr_type, "Pos": "pos"})
-            
-            # Data Cleaning
-            df["pos"] = df["pos"].str.extract(r'([A-Z]+)')[0]
-            df['team'] = df['Player'].apply(lambda x: x.split()[-1] if isinstance(x, str) else None)
-            df['name'] = df['Player'].apply(lambda x: ' '.join(x.split()[:-1]) if isinstance(x, str) else None)
-            
-            current_df = df[["name", "team", "pos", ppr_type]].copy()
-            current_df = _add_player_key(current_df)
-
-            if merged_df is None:
-                merged_df = current_df
-            else:
-                merged_df = pd.merge(merged_df, current_df[['key', ppr_type]], on="key", how="outer")
-
-        except Exception as e:
-            LOGGER.error(f"Could not parse data for {ppr_type} at {url}: {e}")
+    for ppr_type, current_df in zip(urls, results):
+        if current_df is None:
             continue
+        if merged_df is None:
+            merged_df = current_df
+        else:
+            merged_df = pd.merge(merged_df, current_df[['key', ppr_type]], on="key", how="outer", validate="1:1")
+
+    if merged_df is None:
+        return
 
-    if merged_df is not None:
-        output_path = os.path.join(RAW_ADP, f"FantasyPros-ADP-{year}.csv")
-        merged_df.to_csv(output_path, index=False)
-        LOGGER.info(f"Successfully saved merged FantasyPros ADP data to {output_path}")
+    output_path = os.path.join(RAW_ADP, f"FantasyPros-ADP-{year}.csv")
+    merged_df.to_csv(output_path, index=False)
+    LOGGER.info(f"Successfully saved merged FantasyPros ADP data to {output_path}")